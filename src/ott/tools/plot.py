@@ -11,11 +11,10 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from typing import List, Optional, Sequence, Tuple, Union
+from typing import List, NamedTuple, Optional, Sequence, Tuple, Union
 
 import jax.numpy as jnp
 import numpy as np
-import scipy
 
 from ott import utils
 from ott.geometry import pointcloud
@@ -25,24 +24,61 @@ from ott.solvers.quadratic import gromov_wasserstein
 try:
   import matplotlib.pyplot as plt
   from matplotlib import animation
+  from matplotlib.collections import LineCollection
 except ImportError:
-  plt = animation = None
+  plt = animation = LineCollection = None
 
 # TODO(michalk8): make sure all outputs conform to a unified transport interface
 Transport = Union[sinkhorn.SinkhornOutput, sinkhorn_lr.LRSinkhornOutput,
                   gromov_wasserstein.GWOutput]
 
 
+class MappingArrays(NamedTuple):
+  """Lines representing the mapping between 2 point clouds, one row per line.
+
+  Args:
+    starts: start points of the lines, in the first point cloud, of shape
+      ``[E, 2]``.
+    ends: end points of the lines, in the second point cloud, of shape
+      ``[E, 2]``.
+    linewidths: widths of the lines, of shape ``[E,]``.
+    colors: RGBA colors of the lines, including their transparency, of shape
+      ``[E, 4]``.
+  """
+  starts: np.ndarray
+  ends: np.ndarray
+  linewidths: np.ndarray
+  colors: np.ndarray
+
+  @property
+  def segments(self) -> np.ndarray:
+    """Lines as segments, of shape ``[E, 2, 2]``."""
+    return np.stack([self.starts, self.ends], axis=1)
+
+
+# Point positions and sizes of both point clouds, followed by the lines.
+Frame = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray,
+              Optional[MappingArrays]]
+
+
 def bidimensional(x: jnp.ndarray,
-                  y: jnp.ndarray) -> Tuple[jnp.ndarray, jnp.ndarray]:
-  """Apply PCA to reduce to bi-dimensional data."""
+                  y: jnp.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+  """Apply PCA to reduce to bi-dimensional data.
+
+  Both point clouds are centered by their joint mean before being projected
+  onto their 2 principal axes. Data with fewer than 3 dimensions is returned
+  as is, converted to NumPy.
+  """
+  x, y = np.asarray(x), np.asarray(y)
   if x.shape[1] < 3:
     return x, y
 
-  u, s, _ = scipy.sparse.linalg.svds(jnp.concatenate([x, y], axis=0), k=2)
-  proj = u * s
-  k = x.shape[0]
-  return proj[:k], proj[k:]
+  mean = (x.sum(axis=0) + y.sum(axis=0)) / (x.shape[0] + y.shape[0])
+  x, y = x - mean, y - mean
+  # Principal axes of the stacked point clouds, without materializing them.
+  _, vecs = np.linalg.eigh(x.T @ x + y.T @ y)
+  axes = vecs[:, :-3:-1]
+  return x @ axes, y @ axes
 
 
 class Plot:
@@ -50,12 +86,28 @@ class Plot:
 
   It enables to either plot or update a plot in a single object, offering the
   possibilities to create animations as a
-  :class:`~matplotlib.animation.FuncAnimation`, which can in turned be saved to
-  disk at will. There are two design principles here:
+  :class:`~matplotlib.animation.FuncAnimation` or an
+  :class:`~matplotlib.animation.ArtistAnimation`, which can in turned be saved
+  to disk at will. There are two design principles here:
 
   #. we do not rely on saving to/loading from disk to create animations
   #. we try as much as possible to disentangle the transport problem from
      its visualization.
+
+  Args:
+    fig: figure to plot on. If `None`, use the current figure.
+    ax: axes to plot on. If `None`, use the current axes.
+    cost_threshold: only plot the lines of the coupling whose value is above
+      this threshold. Should be negative for animations.
+    scale: scale of the points' sizes.
+    show_lines: whether to plot the lines of the coupling.
+    cmap: name of the colormap used for the lines.
+    scale_alpha_by_coupling: whether to scale the lines' transparency with
+      the value of the coupling.
+    alpha: transparency of the lines.
+    max_lines: maximum number of lines to plot. If more entries of the
+      coupling are above ``cost_threshold``, only the largest ones are kept.
+      If `None`, plot all of them.
   """
 
   def __init__(
@@ -68,9 +120,14 @@ class Plot:
       cmap: str = "cool",
       scale_alpha_by_coupling: bool = False,
       alpha: float = 0.7,
+      max_lines: Optional[int] = 10_000,
   ):
     if plt is None:
       raise RuntimeError("Please install `matplotlib` first.")
+    if max_lines is not None and max_lines <= 0:
+      raise ValueError(
+          f"Expected `max_lines` to be `None` or positive, found {max_lines}."
+      )
 
     if ax is None and fig is None:
       fig, ax = plt.subplots()
@@ -81,14 +138,17 @@ class Plot:
     self.fig = fig
     self.ax = ax
     self._show_lines = show_lines
-    self._lines = []
+    self._lines = None
     self._points_x = None
     self._points_y = None
     self._threshold = cost_threshold
     self._scale = scale
     self._cmap = cmap
+    self._cmap_obj = plt.get_cmap(cmap)
     self._scale_alpha_by_coupling = scale_alpha_by_coupling
     self._alpha = alpha
+    self._max_lines = max_lines
+    self._pca_cache = None
 
   def _scatter(self, ot: Transport):
     """Compute the position and scales of the points on a 2D plot."""
@@ -96,108 +156,119 @@ class Plot:
       raise ValueError("So far we only plot PointCloud geometry.")
 
     x, y = ot.geom.x, ot.geom.y
-    a, b = ot.a, ot.b
-    x, y = bidimensional(x, y)
+    # Only remember the last geometry, which consecutive frames often share.
+    cache = self._pca_cache
+    if cache is None or cache[0] is not x or cache[1] is not y:
+      cache = self._pca_cache = (x, y, *bidimensional(x, y))
+    _, _, x, y = cache
+    a, b = np.asarray(ot.a), np.asarray(ot.b)
     scales_x = a * self._scale * a.shape[0]
     scales_y = b * self._scale * b.shape[0]
     return x, y, scales_x, scales_y
 
-  def _mapping(self, x: jnp.ndarray, y: jnp.ndarray, matrix: jnp.ndarray):
-    """Compute the lines representing the mapping between the 2 point clouds."""
-    # Only plot the lines with a cost above the threshold.
-    u, v = jnp.where(matrix > self._threshold)
-    c = matrix[jnp.where(matrix > self._threshold)]
-    xy = jnp.concatenate([x[u], y[v]], axis=-1)
+  def _mapping(
+      self, x: np.ndarray, y: np.ndarray, matrix: jnp.ndarray
+  ) -> MappingArrays:
+    """Compute the lines representing the mapping between the 2 point clouds.
 
-    # Check if we want to adjust transparency.
-    scale_alpha_by_coupling = self._scale_alpha_by_coupling
+    Everything is computed on host with NumPy, no JAX operation is dispatched.
+    """
+    x, y, matrix = np.asarray(x), np.asarray(y), np.asarray(matrix)
 
-    # We can only adjust transparency if max(c) != min(c).
-    if scale_alpha_by_coupling:
-      min_matrix, max_matrix = jnp.min(c), jnp.max(c)
-      scale_alpha_by_coupling = max_matrix != min_matrix
+    # Only plot the lines with a cost above the threshold.
+    c = matrix.ravel()
+    if c.min() > self._threshold:
+      # All lines are kept (e.g. with a negative threshold), skip the mask.
+      idx = np.arange(c.size)
+    else:
+      idx = np.flatnonzero(c > self._threshold)
+      c = c[idx]
+
+    # Only keep the strongest lines, rendering cost grows with their number.
+    if self._max_lines is not None and c.size > self._max_lines:
+      top = np.argpartition(c, -self._max_lines)[-self._max_lines:]
+      idx, c = idx[top], c[top]
+    u, v = np.unravel_index(idx, matrix.shape)
+    strengths = max(matrix.shape) * c
 
-    result = []
-    for i in range(xy.shape[0]):
-      strength = jnp.max(jnp.array(matrix.shape)) * c[i]
-      if scale_alpha_by_coupling:
-        normalized_strength = (c[i] - min_matrix) / (max_matrix - min_matrix)
-        alpha = self._alpha * float(normalized_strength)
-      else:
-        alpha = self._alpha
+    # We can only adjust transparency if max(c) != min(c).
+    if self._scale_alpha_by_coupling and c.size and np.ptp(c) > 0:
+      alphas = self._alpha * (c - c.min()) / np.ptp(c)
+    else:
+      alphas = np.full_like(c, self._alpha)
+
+    # Matplotlib's transparency is sensitive to numerical errors.
+    # It is stored in the colors, so the number of lines can change freely.
+    colors = self._cmap_obj(strengths)
+    colors[:, 3] = np.clip(alphas, 0.0, 1.0)
+
+    return MappingArrays(
+        starts=x[u],
+        ends=y[v],
+        linewidths=0.5 + 4 * strengths,
+        colors=colors,
+    )
 
-      # Matplotlib's transparency is sensitive to numerical errors.
-      alpha = np.clip(alpha, 0.0, 1.0)
+  def _prepare(self, ot: Transport) -> Frame:
+    """Compute the arrays needed to draw a transport, without touching artists.
 
-      start, end = xy[i, [0, 2]], xy[i, [1, 3]]
-      result.append((start, end, strength, alpha))
+    Returns the point positions and sizes, followed by the lines (``None`` if
+    lines are hidden).
+    """
+    x, y, sx, sy = self._scatter(ot)
+    lines = self._mapping(x, y, ot.matrix) if self._show_lines else None
+    return x, y, sx, sy, lines
 
-    return result
+  def _apply(self, frame: Frame) -> List["plt.Artist"]:
+    """Assign precomputed arrays from :meth:`_prepare` to the artists."""
+    x, y, sx, sy, lines = frame
+    self._points_x.set_offsets(x)
+    self._points_y.set_offsets(y)
+    self._points_x.set_sizes(sx)
+    self._points_y.set_sizes(sy)
+    if not self._show_lines:
+      return [self._points_x, self._points_y]
+
+    self._lines.set_segments(lines.segments)
+    self._lines.set_linewidths(lines.linewidths)
+    self._lines.set_color(lines.colors)
+    return [self._points_x, self._points_y, self._lines]
+
+  def _add_lines(self, lines: MappingArrays) -> "LineCollection":
+    """Add a collection of lines representing the mapping to the axes."""
+    collection = LineCollection(
+        lines.segments,
+        linewidths=lines.linewidths,
+        colors=lines.colors,
+        zorder=0,
+    )
+    self.ax.add_collection(collection)
+    return collection
 
-  def __call__(self, ot: Transport) -> List["plt.Artist"]:
-    """Plot 2-D couplings. Projects via PCA if data is higher dimensional."""
-    x, y, sx, sy = self._scatter(ot)
+  def _draw(self, frame: Frame) -> List["plt.Artist"]:
+    """Create the artists from precomputed arrays from :meth:`_prepare`."""
+    x, y, sx, sy, lines = frame
     self._points_x = self.ax.scatter(
         *x.T, s=sx, edgecolors="k", marker="o", label="x"
     )
     self._points_y = self.ax.scatter(
         *y.T, s=sy, edgecolors="k", marker="X", label="y"
     )
-    self.ax.legend(fontsize=15)
+    if self.ax.get_legend() is None:
+      self.ax.legend(fontsize=15)
     if not self._show_lines:
-      return []
-
-    lines = self._mapping(x, y, ot.matrix)
-    cmap = plt.get_cmap(self._cmap)
-    self._lines = []
-    for start, end, strength, alpha in lines:
-      line, = self.ax.plot(
-          start,
-          end,
-          linewidth=0.5 + 4 * strength,
-          color=cmap(strength),
-          zorder=0,
-          alpha=alpha
-      )
-      self._lines.append(line)
-    return [self._points_x, self._points_y] + self._lines
+      return [self._points_x, self._points_y]
+
+    self._lines = self._add_lines(lines)
+    return [self._points_x, self._points_y, self._lines]
+
+  def __call__(self, ot: Transport) -> List["plt.Artist"]:
+    """Plot 2-D couplings. Projects via PCA if data is higher dimensional."""
+    return self._draw(self._prepare(ot))
 
   def update(self, ot: Transport) -> List["plt.Artist"]:
     """Update a plot with a transport instance."""
-    x, y, _, _ = self._scatter(ot)
-    self._points_x.set_offsets(x)
-    self._points_y.set_offsets(y)
-    if not self._show_lines:
-      return []
-
-    new_lines = self._mapping(x, y, ot.matrix)
-    cmap = plt.get_cmap(self._cmap)
-    for line, new_line in zip(self._lines, new_lines):
-      start, end, strength, alpha = new_line
-
-      line.set_data(start, end)
-      line.set_linewidth(0.5 + 4 * strength)
-      line.set_color(cmap(strength))
-      line.set_alpha(alpha)
-
-    # Maybe add new lines to the plot.
-    num_lines = len(self._lines)
-    num_to_plot = len(new_lines) if self._show_lines else 0
-    for i in range(num_lines, num_to_plot):
-      start, end, strength, alpha = new_lines[i]
-
-      line, = self.ax.plot(
-          start,
-          end,
-          linewidth=0.5 + 4 * strength,
-          color=cmap(strength),
-          zorder=0,
-          alpha=alpha
-      )
-      self._lines.append(line)
-
-    self._lines = self._lines[:num_to_plot]  # Maybe remove some
-    return [self._points_x, self._points_y] + self._lines
+    return self._apply(self._prepare(ot))
 
   def animate(
       self,
@@ -205,16 +276,46 @@ class Plot:
       frame_rate: float = 10.0
   ) -> "animation.FuncAnimation":
     """Make an animation from several transports."""
-    _ = self(transports[0])
+    # Compute everything upfront, so that playback only updates the artists.
+    frames = [self._prepare(t) for t in transports]
+    _ = self._draw(frames[0])
     return animation.FuncAnimation(
         self.fig,
-        lambda i: self.update(transports[i]),
-        np.arange(0, len(transports)),
-        init_func=lambda: self.update(transports[0]),
+        lambda i: self._apply(frames[i]),
+        np.arange(0, len(frames)),
+        init_func=lambda: self._apply(frames[0]),
         interval=1000 / frame_rate,
         blit=True
     )
 
+  def animate_artist(
+      self,
+      transports: Sequence[Transport],
+      frame_rate: float = 10.0
+  ) -> "animation.ArtistAnimation":
+    """Make an animation from several transports, rendering each frame once.
+
+    Unlike :meth:`animate`, every frame gets its own artists, so playback
+    only toggles their visibility instead of updating them.
+    """
+    frame_artists = [self(transports[0])]
+    # Keep the colors of the first frame, instead of cycling through them.
+    color_x = self._points_x.get_facecolor()
+    color_y = self._points_y.get_facecolor()
+    for t in transports[1:]:
+      x, y, sx, sy, lines = self._prepare(t)
+      artists = [
+          self.ax.scatter(*x.T, s=sx, c=color_x, edgecolors="k", marker="o"),
+          self.ax.scatter(*y.T, s=sy, c=color_y, edgecolors="k", marker="X"),
+      ]
+      if self._show_lines:
+        artists.append(self._add_lines(lines))
+      frame_artists.append(artists)
+
+    return animation.ArtistAnimation(
+        self.fig, frame_artists, interval=1000 / frame_rate, blit=True
+    )
+
 
 def _barycenters(
     ax: "plt.Axes",
@@ -225,9 +326,11 @@ def _barycenters(
     scale: int = 200
 ) -> None:
   """Plot 2-D sinkhorn barycenters."""
-  sa, sb = jnp.min(a) / scale, jnp.min(b) / scale
+  y, a, b = np.asarray(y), np.asarray(a), np.asarray(b)
+  matrix = np.asarray(matrix)
+  sa, sb = a.min() / scale, b.min() / scale
   ax.scatter(*y.T, s=b / sb, edgecolors="k", marker="X", label="y")
-  tx = 1 / a[:, None] * jnp.matmul(matrix, y)
+  tx = (matrix @ y) / a[:, None]
   ax.scatter(*tx.T, s=a / sa, edgecolors="k", marker="X", label="T(x)")
   ax.legend(fontsize=15)
 
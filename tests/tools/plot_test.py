@@ -0,0 +1,175 @@
+# Copyright OTT-JAX
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pathlib
+from typing import Optional
+
+import jax
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+from matplotlib import animation
+from ott.geometry import pointcloud
+from ott.problems.linear import linear_problem
+from ott.solvers.linear import sinkhorn
+from ott.tools import plot
+
+
+class TestPlot:
+
+  @pytest.fixture(autouse=True)
+  def setUp(self, rng: jax.random.PRNGKeyArray):
+    plt.switch_backend("Agg")
+    rngs = jax.random.split(rng, 2)
+    self.x = jax.random.normal(rngs[0], (13, 2))
+    self.y = jax.random.normal(rngs[1], (11, 2)) + 1.0
+    geom = pointcloud.PointCloud(self.x, self.y, epsilon=1e-1)
+    prob = linear_problem.LinearProblem(geom)
+    self.transports = [
+        sinkhorn.Sinkhorn(max_iterations=n, min_iterations=n)(prob)
+        for n in (1, 10, 200)
+    ]
+    self.fig, self.ax = plt.subplots()
+    yield
+    plt.close(self.fig)
+
+  def _num_lines(self, matrix: np.ndarray, threshold: float) -> int:
+    return int(np.sum(np.asarray(matrix) > threshold))
+
+  def test_update_changing_num_lines(self):
+    threshold = 1e-3
+    first, last = self.transports[0], self.transports[-1]
+    expected = [
+        self._num_lines(t.matrix, threshold) for t in (first, last, first)
+    ]
+    assert expected[0] != expected[1]
+
+    p = plot.Plot(self.fig, self.ax, cost_threshold=threshold)
+    artists = p(first)
+    assert len(artists) == 3
+    assert len(artists[-1].get_segments()) == expected[0]
+    for t, num_lines in zip((last, first), expected[1:]):
+      artists = p.update(t)
+      assert len(artists[-1].get_segments()) == num_lines
+    self.fig.canvas.draw()
+
+  def test_no_line_above_threshold(self):
+    p = plot.Plot(self.fig, self.ax, cost_threshold=10.0)
+    artists = p(self.transports[-1])
+    assert len(artists[-1].get_segments()) == 0
+    artists = p.update(self.transports[0])
+    assert len(artists[-1].get_segments()) == 0
+    self.fig.canvas.draw()
+
+  def test_hide_lines(self):
+    p = plot.Plot(self.fig, self.ax, show_lines=False)
+    artists = p(self.transports[0])
+    assert artists == [p._points_x, p._points_y]
+    assert p.update(self.transports[-1]) == artists
+    np.testing.assert_allclose(
+        artists[0].get_sizes(),
+        self.transports[-1].a * 200 * self.x.shape[0],
+        rtol=1e-5
+    )
+
+  @pytest.mark.parametrize("show_lines", [False, True])
+  def test_animate(self, tmp_path: pathlib.Path, show_lines: bool):
+    p = plot.Plot(self.fig, self.ax, show_lines=show_lines)
+    anim = p.animate(self.transports, frame_rate=20.0)
+    assert isinstance(anim, animation.FuncAnimation)
+    anim.save(tmp_path / "anim.gif", writer="pillow")
+    assert (tmp_path / "anim.gif").is_file()
+
+  def test_animate_artist(self, tmp_path: pathlib.Path):
+    p = plot.Plot(self.fig, self.ax)
+    anim = p.animate_artist(self.transports, frame_rate=20.0)
+    assert isinstance(anim, animation.ArtistAnimation)
+    # 2 scatters and 1 collection of lines per frame.
+    assert len(self.ax.collections) == 3 * len(self.transports)
+    anim.save(tmp_path / "anim.gif", writer="pillow")
+    assert (tmp_path / "anim.gif").is_file()
+
+  @pytest.mark.parametrize("max_lines", [None, 1, 5])
+  def test_max_lines(self, max_lines: Optional[int]):
+    matrix = np.asarray(self.transports[-1].matrix)
+    p = plot.Plot(self.fig, self.ax, max_lines=max_lines)
+    lines = p(self.transports[-1])[-1]
+
+    expected = np.sort(matrix.ravel())[::-1]
+    if max_lines is not None:
+      expected = expected[:max_lines]
+    linewidths = np.sort(lines.get_linewidths())[::-1]
+    np.testing.assert_allclose(
+        linewidths, 0.5 + 4 * max(matrix.shape) * expected, rtol=1e-5
+    )
+
+  @pytest.mark.parametrize("max_lines", [0, -1])
+  def test_invalid_max_lines(self, max_lines: int):
+    with pytest.raises(ValueError, match="max_lines"):
+      _ = plot.Plot(self.fig, self.ax, max_lines=max_lines)
+
+  @pytest.mark.parametrize("scale_alpha_by_coupling", [False, True])
+  def test_mapping_arrays(self, scale_alpha_by_coupling: bool):
+    alpha = 0.5
+    matrix = np.asarray(self.transports[-1].matrix)
+    x, y = np.asarray(self.x), np.asarray(self.y)
+    p = plot.Plot(
+        self.fig,
+        self.ax,
+        scale_alpha_by_coupling=scale_alpha_by_coupling,
+        alpha=alpha
+    )
+    lines = p._mapping(x, y, matrix)
+    num_lines = matrix.size
+
+    assert isinstance(lines, plot.MappingArrays)
+    assert lines.starts.shape == (num_lines, 2)
+    assert lines.ends.shape == (num_lines, 2)
+    assert lines.linewidths.shape == (num_lines,)
+    assert lines.colors.shape == (num_lines, 4)
+    assert lines.segments.shape == (num_lines, 2, 2)
+    np.testing.assert_array_equal(lines.segments[:, 0], lines.starts)
+    np.testing.assert_array_equal(lines.segments[:, 1], lines.ends)
+    # Every pair of points is connected exactly once.
+    pairs = {(tuple(s), tuple(e)) for s, e in zip(lines.starts, lines.ends)}
+    assert pairs == {(tuple(s), tuple(e)) for s in x for e in y}
+
+    alphas = lines.colors[:, 3]
+    if scale_alpha_by_coupling:
+      np.testing.assert_allclose(alphas.min(), 0.0, atol=1e-6)
+      np.testing.assert_allclose(alphas.max(), alpha, rtol=1e-6)
+    else:
+      np.testing.assert_allclose(alphas, alpha)
+
+  @pytest.mark.parametrize("dim", [2, 5])
+  def test_bidimensional(self, rng: jax.random.PRNGKeyArray, dim: int):
+    rngs = jax.random.split(rng, 2)
+    x = jax.random.normal(rngs[0], (13, dim))
+    y = jax.random.normal(rngs[1], (11, dim)) + 1.0
+
+    proj_x, proj_y = plot.bidimensional(x, y)
+
+    assert isinstance(proj_x, np.ndarray)
+    assert isinstance(proj_y, np.ndarray)
+    if dim < 3:
+      np.testing.assert_array_equal(proj_x, x)
+      np.testing.assert_array_equal(proj_y, y)
+      return
+
+    xy = np.concatenate([x, y], axis=0).astype(np.float64)
+    u, s, _ = np.linalg.svd(xy - xy.mean(axis=0), full_matrices=False)
+    expected = u[:, :2] * s[:2]
+    actual = np.concatenate([proj_x, proj_y], axis=0)
+    # Principal axes are only defined up to their sign.
+    signs = np.sign(np.sum(actual * expected, axis=0))
+    np.testing.assert_allclose(actual * signs, expected, rtol=1e-4, atol=1e-4)